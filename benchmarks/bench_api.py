@@ -0,0 +1,113 @@
+# Latency and throughput of the FastAPI endpoints in docker/api/app/main.py under concurrent clients
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "docker", "api")
+
+ENDPOINTS = [
+    "/company/",
+    "/headcount/",
+    "/headcount/enriched/",
+    "/revenue/",
+    "/revenue/enriched/",
+    "/date/",
+    "/version/",
+    "/revenue/?since={since}",
+    "/deletions/?since=0",
+    "/finance/revenue-per-employee/?end_month=2025-12-01",
+    "/metrics",
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(database_url, workers=1):
+    """Start uvicorn on a free port against database_url; returns (process, base_url)."""
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=API_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{base_url}/version/", timeout=1).raise_for_status()
+            return process, base_url
+        except requests.exceptions.RequestException:
+            if process.poll() is not None:
+                raise RuntimeError("API process exited during startup")
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("API did not become ready")
+
+
+def stop_api(process):
+    process.terminate()
+    process.wait(timeout=10)
+
+
+def server_db_ms(response):
+    """Database time the API reports in its Server-Timing header, None if absent."""
+    for metric in response.headers.get("Server-Timing", "").split(","):
+        name, _, duration = metric.strip().partition(";dur=")
+        if name == "db" and duration:
+            return float(duration)
+    return None
+
+
+def measure(url, clients, requests_per_client):
+    """Each client thread sends requests_per_client requests on its own session."""
+    local = threading.local()
+
+    def call(_):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        response = local.session.get(url)
+        response.raise_for_status()
+        return time.perf_counter() - start, len(response.content), server_db_ms(response)
+
+    total = clients * requests_per_client
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        samples = list(pool.map(call, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array([s[0] for s in samples]) * 1000
+    db_ms = [s[2] for s in samples if s[2] is not None]
+    return {
+        "clients": clients,
+        "requests": total,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "requests_per_second": round(total / elapsed, 1),
+        "response_bytes": samples[0][1],
+        "server_db_p50_ms": round(float(np.percentile(db_ms, 50)), 3) if db_ms else None,
+    }
+
+
+def run(base_url, concurrency, requests_per_client):
+    # Delta endpoints are measured against the changes of the latest ETL run
+    since = requests.get(f"{base_url}/version/").json()["load_version"] - 1
+    results = []
+    for endpoint in ENDPOINTS:
+        endpoint = endpoint.format(since=since)
+        url = f"{base_url}{endpoint}"
+        requests.get(url).raise_for_status()  # warm up
+        for clients in concurrency:
+            results.append({"endpoint": endpoint, **measure(url, clients, requests_per_client)})
+    return results
@@ -0,0 +1,37 @@
+# Fetch-merge-aggregate path of docker/streamlit/streamlit_app.py, run headless with AppTest
+import os
+import time
+from streamlit.testing.v1 import AppTest
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "docker", "streamlit", "streamlit_app.py")
+
+PAGES = ["Arsipa's Facts and Dimensions", "Master Data & KPIs", "Management Board", "Finance Use Case"]
+
+
+def timed_run(app):
+    start = time.perf_counter()
+    app.run()
+    seconds = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"Dashboard raised: {app.exception[0].message}")
+    return round(seconds, 4)
+
+
+def run(base_url, refresh=None, timeout=120):
+    """Cold start, rerun with cached frames, one run per page and, if refresh is given,
+    a rerun after calling refresh() (e.g. an ETL monthly load) to time the delta sync."""
+    os.environ["FASTAPI_URL"] = base_url
+    app = AppTest.from_file(APP_FILE, default_timeout=timeout)
+
+    results = {"cold_start_seconds": timed_run(app)}
+    results["cached_rerun_seconds"] = timed_run(app)
+    results["pages"] = {}
+    for page in PAGES:
+        app.sidebar.radio[0].set_value(page)
+        results["pages"][page] = timed_run(app)
+
+    if refresh is not None:
+        app.sidebar.radio[0].set_value(PAGES[0])
+        refresh()
+        results["delta_rerun_seconds"] = timed_run(app)
+    return results
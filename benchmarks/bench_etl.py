@@ -0,0 +1,46 @@
+# ETL load throughput for etl/load_data.py
+import os
+import sys
+import time
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "etl"))
+import load_data  # noqa: E402
+
+from datasets import change_last_month  # noqa: E402
+
+ETL_TABLES = ["fact_revenue", "fact_headcount", "dim_date", "dim_company", "etl_deletion", "etl_load"]
+
+
+def reset_database(engine):
+    """Drop everything the ETL creates so each scale starts from an empty database."""
+    with engine.begin() as conn:
+        for table in ETL_TABLES:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+
+def timed_load(engine, data_dir):
+    start = time.perf_counter()
+    tables = load_data.read_csvs(data_dir)
+    load_data.create_tables(engine, tables)
+    load_version, stats = load_data.sync_tables(engine, tables)
+    seconds = time.perf_counter() - start
+    rows = sum(len(df) for _, _, df in tables)
+    changed = sum(counts["upserted"] + counts["deleted"] for counts in stats.values())
+    return {
+        "load_version": load_version,
+        "seconds": round(seconds, 4),
+        "rows_read": rows,
+        "rows_changed": changed,
+        "rows_read_per_second": round(rows / seconds, 1),
+    }
+
+
+def run(engine, data_dir):
+    """Full load into an empty database, no-op reload, then a reload with one changed month."""
+    reset_database(engine)
+    results = {"full_load": timed_load(engine, data_dir)}
+    results["unchanged_reload"] = timed_load(engine, data_dir)
+    change_last_month(data_dir)
+    results["monthly_refresh"] = timed_load(engine, data_dir)
+    return results
@@ -0,0 +1,59 @@
+# Builds scaled copies of the CSVs in data_prep/ for the benchmarks
+import os
+import pandas as pd
+
+DATA_PREP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_prep")
+
+
+def build_scaled_dataset(scale, out_dir):
+    """Write companies/headcount/revenue/dim_date CSVs with `scale` copies of every company.
+
+    Copy k of a company gets company_id + k * n_companies and its own fact row ids,
+    so a scale of 10 on the 5 mock companies gives 50 companies and 1200 rows per fact table.
+    Returns the number of rows per table.
+    """
+    companies = pd.read_csv(os.path.join(DATA_PREP_DIR, "companies.csv"))
+    headcount = pd.read_csv(os.path.join(DATA_PREP_DIR, "headcount.csv"))
+    revenue = pd.read_csv(os.path.join(DATA_PREP_DIR, "revenue.csv"))
+    dim_date = pd.read_csv(os.path.join(DATA_PREP_DIR, "dim_date.csv"))
+
+    n_companies = companies["company_id"].max()
+    n_rows = revenue["id"].max()
+
+    def replicate(df, id_col=None):
+        copies = []
+        for k in range(scale):
+            copy = df.copy()
+            copy["company_id"] += k * n_companies
+            if id_col:
+                copy[id_col] += k * n_rows
+            copies.append(copy)
+        return pd.concat(copies, ignore_index=True)
+
+    companies_scaled = replicate(companies)
+    companies_scaled["company_name"] = [
+        name if k == 0 else f"{name} {k}"
+        for k in range(scale) for name in companies["company_name"]
+    ]
+
+    os.makedirs(out_dir, exist_ok=True)
+    tables = {
+        "companies.csv": companies_scaled,
+        "headcount.csv": replicate(headcount, "id"),
+        "revenue.csv": replicate(revenue, "id"),
+        "dim_date.csv": dim_date,
+    }
+    for name, df in tables.items():
+        df.to_csv(os.path.join(out_dir, name), index=False)
+    return {name: len(df) for name, df in tables.items()}
+
+
+def change_last_month(out_dir, factor=1.01):
+    """Simulate a monthly refresh: rescale the revenue of the latest month in place.
+    Returns the number of changed rows."""
+    path = os.path.join(out_dir, "revenue.csv")
+    revenue = pd.read_csv(path)
+    last_month = revenue["month"] == revenue["month"].max()
+    revenue.loc[last_month, "revenue_eur"] = (revenue.loc[last_month, "revenue_eur"] * factor).astype(int)
+    revenue.to_csv(path, index=False)
+    return int(last_month.sum())
@@ -0,0 +1,108 @@
+"""End-to-end benchmarks for the ETL, the API and the dashboard data path.
+
+Runs against a SQLite file by default, or against a local Postgres via --database-url.
+All ETL tables in that database are dropped first, so --database-url requires --allow-drop. Results are written to JSON,
+one file per commit, so runs can be compared between commits.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/run_benchmarks.py --scales 1 10 100
+    python benchmarks/run_benchmarks.py --database-url postgresql://user:pw@localhost:5432/bench --allow-drop
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from sqlalchemy import create_engine
+
+import bench_api
+import bench_etl
+from datasets import build_scaled_dataset, change_last_month
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="SQLAlchemy URL of the benchmark database (default: SQLite temp file)")
+    parser.add_argument("--allow-drop", action="store_true",
+                        help="confirm that the ETL tables in --database-url may be dropped")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100],
+                        help="copies of the mock companies per run (default: 1 10 100)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="concurrent API clients (default: 1 8 32)")
+    parser.add_argument("--requests-per-client", type=int, default=20)
+    parser.add_argument("--api-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--skip", choices=["api", "dashboard"], nargs="*", default=[])
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+    if args.database_url and not args.allow_drop:
+        parser.error("--database-url drops all ETL tables in that database; pass --allow-drop to confirm")
+    return args
+
+
+def main():
+    args = parse_args()
+    commit = git_commit()
+    output = args.output or os.path.join(REPO_DIR, "benchmarks", "results", f"{commit[:12]}.json")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        engine = create_engine(database_url)
+
+        results = {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "runs": [],
+        }
+
+        for scale in args.scales:
+            print(f"scale {scale}: building dataset")
+            data_dir = os.path.join(tmp_dir, f"scale_{scale}")
+            run = {"scale": scale, "rows": build_scaled_dataset(scale, data_dir)}
+
+            print(f"scale {scale}: ETL")
+            run["etl"] = bench_etl.run(engine, data_dir)
+
+            if not {"api", "dashboard"} <= set(args.skip):
+                process, base_url = bench_api.start_api(database_url, workers=args.api_workers)
+                try:
+                    if "api" not in args.skip:
+                        print(f"scale {scale}: API")
+                        run["api"] = bench_api.run(base_url, args.concurrency, args.requests_per_client)
+                    if "dashboard" not in args.skip:
+                        print(f"scale {scale}: dashboard")
+                        import bench_dashboard  # needs streamlit, only imported when the dashboard is measured
+
+                        def monthly_refresh():
+                            change_last_month(data_dir)
+                            bench_etl.timed_load(engine, data_dir)
+
+                        run["dashboard"] = bench_dashboard.run(base_url, refresh=monthly_refresh)
+                finally:
+                    bench_api.stop_api(process)
+
+            results["runs"].append(run)
+        engine.dispose()
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
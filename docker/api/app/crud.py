@@ -1,28 +1,104 @@
 # Contains functions that perform database operations
+from datetime import date
+from sqlalchemy import func, text, bindparam, Date
 from sqlalchemy.orm import Session
-from app.models import Company, Headcount, Revenue, Dim_Date
+from app.models import Company, Headcount, Revenue, Dim_Date, EtlLoad, EtlDeletion
 from typing import Optional
 
-def get_company(postgres: Session, skip: int = 0, limit: Optional[int] = None):
-    query = postgres.query(Company).offset(skip)
+def get_company(postgres: Session, skip: int = 0, limit: Optional[int] = None, since: Optional[int] = None):
+    query = postgres.query(Company)
+    if since is not None:
+        query = query.filter(Company.load_version > since)
+    query = query.offset(skip)
     if limit:
         query = query.limit(limit)
     return query.all()
 
-def get_headcount(postgres: Session, skip: int = 0, limit: Optional[int] = None):
-    query = postgres.query(Headcount).offset(skip)
+def get_headcount(postgres: Session, skip: int = 0, limit: Optional[int] = None, since: Optional[int] = None):
+    query = postgres.query(Headcount)
+    if since is not None:
+        query = query.filter(Headcount.load_version > since)
+    query = query.offset(skip)
     if limit:
         query = query.limit(limit)
     return query.all()
 
-def get_revenue(postgres: Session, skip: int = 0, limit: Optional[int] = None):
-    query = postgres.query(Revenue).offset(skip)
+def get_revenue(postgres: Session, skip: int = 0, limit: Optional[int] = None, since: Optional[int] = None):
+    query = postgres.query(Revenue)
+    if since is not None:
+        query = query.filter(Revenue.load_version > since)
+    query = query.offset(skip)
     if limit:
         query = query.limit(limit)
     return query.all()
 
-def get_date(postgres: Session, skip: int = 0, limit: Optional[int] = None):
-    query = postgres.query(Dim_Date).offset(skip)
+def get_date(postgres: Session, skip: int = 0, limit: Optional[int] = None, since: Optional[int] = None):
+    query = postgres.query(Dim_Date)
+    if since is not None:
+        query = query.filter(Dim_Date.load_version > since)
+    query = query.offset(skip)
     if limit:
         query = query.limit(limit)
-    return query.all()
\ No newline at end of file
+    return query.all()
+
+def get_load_version(postgres: Session):
+    # Latest ETL run; 0 if the ETL has not run yet
+    load_version, loaded_at = postgres.query(func.max(EtlLoad.load_version), func.max(EtlLoad.loaded_at)).one()
+    return {"load_version": load_version or 0, "loaded_at": loaded_at}
+
+def get_deletions(postgres: Session, since: int, table_name: Optional[str] = None):
+    query = postgres.query(EtlDeletion).filter(EtlDeletion.load_version > since)
+    if table_name:
+        query = query.filter(EtlDeletion.table_name == table_name)
+    return query.order_by(EtlDeletion.load_version).all()
+
+
+def get_revenue_per_employee_performance(postgres: Session, window: int = 6, company_ids: Optional[list] = None,
+                                         end_month: Optional[date] = None):
+    # Average revenue per employee over the `window` months up to end_month (default: current month)
+    # per company, compared with the average over all companies (or the given ones):
+    # green >= 100%, yellow >= 90%, red below. Company attributes are added from the dimension cache.
+    end_month = (end_month or date.today()).replace(day=1)
+    start_index = end_month.year * 12 + end_month.month - 1 - window
+    start_month = date(start_index // 12, start_index % 12 + 1, 1)
+
+    company_filter = "AND r.company_id IN :company_ids" if company_ids is not None else ""
+    query = text(f"""
+        WITH monthly AS (
+            SELECT r.company_id,
+                   CAST(r.revenue_eur AS FLOAT) / NULLIF(h.employee_count, 0) AS revenue_per_employee
+            FROM fact_revenue r
+            JOIN fact_headcount h ON h.company_id = r.company_id AND h.month = r.month
+            WHERE r.month > :start_month AND r.month <= :end_month {company_filter}
+        ),
+        per_company AS (
+            SELECT company_id,
+                   COUNT(revenue_per_employee) AS months,
+                   AVG(revenue_per_employee) AS revenue_per_employee
+            FROM monthly
+            WHERE revenue_per_employee IS NOT NULL  -- months with zero headcount
+            GROUP BY company_id
+        ),
+        scored AS (
+            SELECT company_id, months, revenue_per_employee,
+                   AVG(revenue_per_employee) OVER () AS group_average
+            FROM per_company
+        )
+        SELECT s.company_id, s.months, s.revenue_per_employee, s.group_average,
+               s.revenue_per_employee / NULLIF(s.group_average, 0) AS ratio,
+               CASE
+                   WHEN s.revenue_per_employee >= s.group_average THEN 'green'
+                   WHEN s.revenue_per_employee >= 0.9 * s.group_average THEN 'yellow'
+                   ELSE 'red'
+               END AS performance
+        FROM scored s
+        ORDER BY s.revenue_per_employee
+    """).bindparams(bindparam("start_month", type_=Date), bindparam("end_month", type_=Date))
+
+    params = {"start_month": start_month, "end_month": end_month}
+    if company_ids is not None:
+        if not company_ids:
+            return []
+        query = query.bindparams(bindparam("company_ids", expanding=True))
+        params["company_ids"] = company_ids
+    return postgres.execute(query, params).all()
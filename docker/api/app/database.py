@@ -1,8 +1,11 @@
 import os
-from sqlalchemy import create_engine
+import time
+import logging
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
+from .metrics import observe_query
 
 # Load .env only for local development
 if os.getenv("RENDER") is None:
@@ -31,6 +34,33 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base class for SQLAlchemy models
 Base = declarative_base()
 
+# Query timing: every statement is recorded in the metrics, slow ones are logged as well
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_MS", "200")) / 1000
+logger = logging.getLogger("app.sql")
+
+# The start time is kept on the statement's execution context, so nothing is left behind
+# on the pooled connection when a statement fails
+@event.listens_for(engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+def record_query(context, statement):
+    duration = time.perf_counter() - context._query_start
+    slow = duration >= SLOW_QUERY_SECONDS
+    if slow:
+        logger.warning("Slow query (%.1f ms): %s", duration * 1000, statement)
+    observe_query(duration, slow)
+
+@event.listens_for(engine, "after_cursor_execute")
+def record_query_duration(conn, cursor, statement, parameters, context, executemany):
+    record_query(context, statement)
+
+@event.listens_for(engine, "handle_error")
+def record_failed_query_duration(exception_context):
+    context = exception_context.execution_context
+    if context is not None and hasattr(context, "_query_start"):
+        record_query(context, exception_context.statement)
+
 # Create tables (optional)
 def init_db():
     # Create all tables that are defined in Base metadata
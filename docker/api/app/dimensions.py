@@ -0,0 +1,100 @@
+# In-process cache of dim_company and dim_date for enriching fact rows without SQL joins
+import threading
+from datetime import date
+from typing import Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models import Company, Dim_Date
+from app import crud
+
+COMPANY_ATTRIBUTES = ["company_name", "location", "industry"]
+DATE_ATTRIBUTES = ["year", "quarter", "month_num", "month_name"]
+
+
+def month_key(month: date) -> int:
+    return month.year * 12 + month.month - 1
+
+
+class DimensionSnapshot:
+    """Array-backed lookups for one ETL load_version.
+
+    company_pos maps company_id -> row, month_pos maps month_key - month_offset -> row.
+    Every attribute array ends with a None sentinel, so a position of -1 (unknown key) yields None.
+    """
+
+    def __init__(self, load_version: int, companies: list, dates: list):
+        self.load_version = load_version
+
+        company_ids = np.array([c.company_id for c in companies], dtype=np.int64)
+        self.company_pos = np.full(company_ids.max() + 1 if len(company_ids) else 1, -1, dtype=np.int64)
+        self.company_pos[company_ids] = np.arange(len(company_ids))
+        self.company_attrs = {
+            attr: np.array([getattr(c, attr) for c in companies] + [None], dtype=object)
+            for attr in COMPANY_ATTRIBUTES
+        }
+        self.company_ids = company_ids
+
+        month_keys = np.array([month_key(d.month) for d in dates], dtype=np.int64)
+        self.month_offset = int(month_keys.min()) if len(month_keys) else 0
+        self.month_pos = np.full(month_keys.max() - self.month_offset + 1 if len(month_keys) else 1, -1, dtype=np.int64)
+        self.month_pos[month_keys - self.month_offset] = np.arange(len(month_keys))
+        self.date_attrs = {
+            attr: np.array([getattr(d, attr) for d in dates] + [None], dtype=object)
+            for attr in DATE_ATTRIBUTES
+        }
+
+    @staticmethod
+    def _lookup(pos: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        inside = (keys >= 0) & (keys < len(pos))
+        return np.where(inside, pos[np.clip(keys, 0, len(pos) - 1)], -1)
+
+    def company_ids_for_industry(self, industry: str) -> list:
+        return self.company_ids[self.company_attrs["industry"][:-1] == industry].tolist()
+
+    def enrich(self, rows: list, columns: list) -> list:
+        """Copy the given columns of each row and add company and calendar attributes
+        (the latter only if rows have a month)."""
+        if not rows:
+            return []
+        records = {col: [getattr(row, col) for row in rows] for col in columns}
+
+        company_rows = self._lookup(self.company_pos, np.array(records["company_id"], dtype=np.int64))
+        for attr, values in self.company_attrs.items():
+            records[attr] = values[company_rows].tolist()
+
+        if "month" in records:
+            keys = np.array([month_key(m) for m in records["month"]], dtype=np.int64) - self.month_offset
+            date_rows = self._lookup(self.month_pos, keys)
+            for attr, values in self.date_attrs.items():
+                records[attr] = values[date_rows].tolist()
+
+        return [dict(zip(records, values)) for values in zip(*records.values())]
+
+
+class DimensionCache:
+    """Holds the current DimensionSnapshot. The ETL load_version is checked on every request
+    (a single MAX() on etl_load) and the dimensions are reloaded only when it changed."""
+
+    def __init__(self):
+        self._snapshot: Optional[DimensionSnapshot] = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> DimensionSnapshot:
+        load_version = crud.get_load_version(db)["load_version"]
+        companies = db.query(Company.company_id, *[getattr(Company, attr) for attr in COMPANY_ATTRIBUTES]).all()
+        dates = db.query(Dim_Date.month, *[getattr(Dim_Date, attr) for attr in DATE_ATTRIBUTES]).all()
+        self._snapshot = DimensionSnapshot(load_version, companies, dates)
+        return self._snapshot
+
+    def get(self, db: Session) -> DimensionSnapshot:
+        load_version = crud.get_load_version(db)["load_version"]
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.load_version == load_version:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and self._snapshot.load_version == load_version:
+                return self._snapshot  # reloaded by another request meanwhile
+            return self.load(db)
+
+
+dimension_cache = DimensionCache()
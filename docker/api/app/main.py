@@ -1,13 +1,30 @@
-from fastapi import FastAPI, Depends
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import Optional
+from datetime import date
 from . import models, schemas, crud
 from .database import SessionLocal, engine
-from .schemas import Company, Headcount, Revenue, Dim_Date
+from .schemas import Company, Headcount, Revenue, Dim_Date, LoadVersion, Deletion, RevenuePerEmployeePerformance
+from .schemas import EnrichedHeadcount, EnrichedRevenue
 models.Base.metadata.create_all(bind=engine)
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from . import metrics
+from .dimensions import dimension_cache
 
-app = FastAPI()
+# Load the dimension cache at startup; it reloads itself when the ETL load_version changes
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db = SessionLocal()
+    try:
+        dimension_cache.load(db)
+    finally:
+        db.close()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,6 +34,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics: latency, db time, response size and rows per route.
+# Server-Timing lets clients split a slow call into database, app (incl. serialization) and network.
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    stats = metrics.start_request()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        # Unhandled errors become a 500 further out; record them before re-raising
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.finish_request(stats, request.method, route, 500, None, time.perf_counter() - start)
+        raise
+    duration = time.perf_counter() - start
+
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    size = response.headers.get("content-length")
+    metrics.finish_request(stats, request.method, route, response.status_code, int(size) if size else None, duration)
+    response.headers["Server-Timing"] = (
+        f"db;dur={stats['db_seconds'] * 1000:.3f}, app;dur={(duration - stats['db_seconds']) * 1000:.3f}"
+    )
+    return response
+
 # Dependency to get db session
 def get_db():
     db = SessionLocal()
@@ -26,21 +66,61 @@ def get_db():
         db.close()
 
 @app.get("/company/", response_model=list[Company])
-def read_company(skip: int = 0, limit: Optional[int] = None, db: Session = Depends(get_db)):
-    company = crud.get_company(db, skip=skip, limit=limit)
-    return company
+def read_company(skip: int = 0, limit: Optional[int] = None, since: Optional[int] = None, db: Session = Depends(get_db)):
+    company = crud.get_company(db, skip=skip, limit=limit, since=since)
+    return metrics.count_rows(company)
 
 @app.get("/headcount/", response_model=list[Headcount])
-def read_headcount(skip: int = 0, limit: Optional[int] = None, db: Session = Depends(get_db)):
-    headcount = crud.get_headcount(db, skip=skip, limit=limit)
-    return headcount
+def read_headcount(skip: int = 0, limit: Optional[int] = None, since: Optional[int] = None, db: Session = Depends(get_db)):
+    headcount = crud.get_headcount(db, skip=skip, limit=limit, since=since)
+    return metrics.count_rows(headcount)
 
 @app.get("/revenue/", response_model=list[Revenue])
-def read_revenue(skip: int = 0, limit: Optional[int] = None, db: Session = Depends(get_db)):
-    revenue = crud.get_revenue(db, skip=skip, limit=limit)
-    return revenue
+def read_revenue(skip: int = 0, limit: Optional[int] = None, since: Optional[int] = None, db: Session = Depends(get_db)):
+    revenue = crud.get_revenue(db, skip=skip, limit=limit, since=since)
+    return metrics.count_rows(revenue)
 
 @app.get("/date/", response_model=list[Dim_Date])
-def read_date(skip: int = 0, limit: Optional[int] = None, db: Session = Depends(get_db)):
-    date = crud.get_date(db, skip=skip, limit=limit)
-    return date
\ No newline at end of file
+def read_date(skip: int = 0, limit: Optional[int] = None, since: Optional[int] = None, db: Session = Depends(get_db)):
+    date = crud.get_date(db, skip=skip, limit=limit, since=since)
+    return metrics.count_rows(date)
+
+# Fact rows with company and calendar attributes looked up in the dimension cache instead of joined
+@app.get("/headcount/enriched/", response_model=list[EnrichedHeadcount])
+def read_headcount_enriched(skip: int = 0, limit: Optional[int] = None, since: Optional[int] = None, db: Session = Depends(get_db)):
+    headcount = crud.get_headcount(db, skip=skip, limit=limit, since=since)
+    headcount = dimension_cache.get(db).enrich(headcount, ["id", "company_id", "month", "employee_count"])
+    return metrics.count_rows(headcount)
+
+@app.get("/revenue/enriched/", response_model=list[EnrichedRevenue])
+def read_revenue_enriched(skip: int = 0, limit: Optional[int] = None, since: Optional[int] = None, db: Session = Depends(get_db)):
+    revenue = crud.get_revenue(db, skip=skip, limit=limit, since=since)
+    revenue = dimension_cache.get(db).enrich(revenue, ["id", "company_id", "month", "revenue_eur"])
+    return metrics.count_rows(revenue)
+
+# Delta sync: pass the load_version from /version/ as since= to the endpoints above
+# to get only rows inserted or changed after it, and fetch deleted keys from /deletions/
+@app.get("/version/", response_model=LoadVersion)
+def read_version(db: Session = Depends(get_db)):
+    return crud.get_load_version(db)
+
+@app.get("/deletions/", response_model=list[Deletion])
+def read_deletions(since: int, table_name: Optional[str] = None, db: Session = Depends(get_db)):
+    deletions = crud.get_deletions(db, since=since, table_name=table_name)
+    return metrics.count_rows(deletions)
+
+# Finance use case: rolling revenue per employee per company with performance bucket
+@app.get("/finance/revenue-per-employee/", response_model=list[RevenuePerEmployeePerformance])
+def read_revenue_per_employee(window: int = Query(6, ge=1, le=120), industry: Optional[str] = None,
+                              end_month: Optional[date] = None, db: Session = Depends(get_db)):
+    if end_month is not None and end_month.year * 12 + end_month.month - 1 - window < 12:
+        raise HTTPException(status_code=422, detail="end_month minus window must not be before year 1")
+    dimensions = dimension_cache.get(db)
+    company_ids = dimensions.company_ids_for_industry(industry) if industry else None
+    performance = crud.get_revenue_per_employee_performance(db, window=window, company_ids=company_ids, end_month=end_month)
+    performance = dimensions.enrich(performance, ["company_id", "months", "revenue_per_employee", "group_average", "ratio", "performance"])
+    return metrics.count_rows(performance)
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,54 @@
+# Prometheus metrics for the API: request latency, response size, rows returned and query timing
+from contextvars import ContextVar
+from typing import Optional
+from prometheus_client import Counter, Histogram
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds", "Time to handle a request", ["method", "route", "status"],
+)
+REQUEST_DB_TIME = Histogram(
+    "api_request_db_duration_seconds", "Time spent in database queries per request", ["route"],
+)
+RESPONSE_SIZE = Histogram(
+    "api_response_size_bytes", "Size of the response body", ["route"],
+    buckets=[2 ** exp for exp in range(6, 26, 2)],
+)
+ROWS_RETURNED = Histogram(
+    "api_rows_returned", "Rows returned per request", ["route"],
+    buckets=[0, 1, 10, 100, 1000, 10000, 100000],
+)
+QUERY_DURATION = Histogram("db_query_duration_seconds", "Duration of single SQL statements")
+SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than the SLOW_QUERY_MS threshold")
+
+# Per request counters shared between the middleware, the endpoints and the engine events.
+# Holds a dict (not a number) so updates made in the threadpool are visible to the middleware.
+_request_stats: ContextVar[Optional[dict]] = ContextVar("request_stats", default=None)
+
+def start_request():
+    stats = {"db_seconds": 0.0, "queries": 0, "rows": None}
+    _request_stats.set(stats)
+    return stats
+
+def observe_query(duration: float, slow: bool):
+    QUERY_DURATION.observe(duration)
+    if slow:
+        SLOW_QUERIES.inc()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["db_seconds"] += duration
+        stats["queries"] += 1
+
+def count_rows(rows):
+    # Records how many rows an endpoint returns and passes them through unchanged
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["rows"] = len(rows)
+    return rows
+
+def finish_request(stats: dict, method: str, route: str, status: int, size: Optional[int], duration: float):
+    REQUEST_LATENCY.labels(method, route, status).observe(duration)
+    REQUEST_DB_TIME.labels(route).observe(stats["db_seconds"])
+    if size is not None:
+        RESPONSE_SIZE.labels(route).observe(size)
+    if stats["rows"] is not None:
+        ROWS_RETURNED.labels(route).observe(stats["rows"])
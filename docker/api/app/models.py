@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, func
 from .database import Base
 
 class Company(Base):
@@ -8,6 +8,7 @@ class Company(Base):
     company_name = Column(String, index=True, nullable=False)
     location = Column(String, nullable=True)
     industry = Column(String, nullable=True)
+    load_version = Column(Integer, nullable=False, default=0, index=True)
 
 class Dim_Date(Base):
     __tablename__ = 'dim_date'
@@ -18,6 +19,7 @@ class Dim_Date(Base):
     quarter = Column(Integer, nullable=False)
     month_name = Column(String, nullable=False)
     month = Column(Date, unique=True, nullable=False)
+    load_version = Column(Integer, nullable=False, default=0, index=True)
     
 class Revenue(Base):
     __tablename__ = 'fact_revenue'
@@ -26,6 +28,7 @@ class Revenue(Base):
     company_id = Column(Integer, nullable=False)
     month = Column(Date, nullable=False)
     revenue_eur = Column(Float, nullable=False)
+    load_version = Column(Integer, nullable=False, default=0, index=True)
     
 class Headcount(Base):
     __tablename__ = 'fact_headcount'
@@ -33,4 +36,19 @@ class Headcount(Base):
     id = Column(Integer, primary_key=True, index=True)
     company_id = Column(Integer, nullable=False)
     month = Column(Date, nullable=False)
-    employee_count = Column(Integer, nullable=False)
\ No newline at end of file
+    employee_count = Column(Integer, nullable=False)
+    load_version = Column(Integer, nullable=False, default=0, index=True)
+
+class EtlLoad(Base):
+    __tablename__ = 'etl_load'
+
+    load_version = Column(Integer, primary_key=True)
+    loaded_at = Column(DateTime, nullable=True, server_default=func.now())
+
+class EtlDeletion(Base):
+    __tablename__ = 'etl_deletion'
+
+    # Deletion log has no key of its own; the combination identifies a row
+    table_name = Column(String, primary_key=True)
+    row_key = Column(String, primary_key=True)
+    load_version = Column(Integer, primary_key=True, index=True)
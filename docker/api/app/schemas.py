@@ -40,3 +40,42 @@ class Dim_Date(BaseModel):
 
     class Config:
         from_attributes = True  
+
+class LoadVersion(BaseModel):
+    load_version: int
+    loaded_at: Optional[datetime] = None
+
+class Deletion(BaseModel):
+    table_name: str
+    row_key: str
+    load_version: int
+
+    class Config:
+        from_attributes = True
+
+class RevenuePerEmployeePerformance(BaseModel):
+    company_id: int
+    company_name: Optional[str] = None
+    location: Optional[str] = None
+    industry: Optional[str] = None
+    months: int
+    revenue_per_employee: float
+    group_average: float
+    ratio: Optional[float] = None  # None if the group average is 0
+    performance: str  # green (>= group average), yellow (>= 90%) or red
+
+class DimensionAttributes(BaseModel):
+    # Added to fact rows from the in-process dimension cache
+    company_name: Optional[str] = None
+    location: Optional[str] = None
+    industry: Optional[str] = None
+    year: Optional[int] = None
+    quarter: Optional[int] = None
+    month_num: Optional[int] = None
+    month_name: Optional[str] = None
+
+class EnrichedHeadcount(DimensionAttributes, Headcount):
+    pass
+
+class EnrichedRevenue(DimensionAttributes, Revenue):
+    pass
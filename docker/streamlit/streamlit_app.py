@@ -1,6 +1,5 @@
 from datetime import datetime
 import pandas as pd
-import numpy as np
 import requests
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -41,13 +40,55 @@ api_endpoints = {
     "revenue": f"{FASTAPI_BASE_URL}/revenue/"
 }
 
+# Table and key column behind each endpoint, used to apply deltas to the cached frames
+api_tables = {
+    "company": ("dim_company", "company_id"),
+    "headcount": ("fact_headcount", "id"),
+    "date": ("dim_date", "month"),
+    "revenue": ("fact_revenue", "id")
+}
+
+# Frames survive reruns in the session together with the ETL load_version they reflect
+if "api_frames" not in st.session_state:
+    st.session_state["api_frames"] = {}
+
+try:
+    response = requests.get(f"{FASTAPI_BASE_URL}/version/")
+    response.raise_for_status()
+    load_version = response.json()["load_version"]
+except requests.exceptions.RequestException:
+    load_version = None  # API without delta sync: always fetch everything
+
 for endpoint, url in api_endpoints.items():
     df_name = f"df_{endpoint}"
+    table_name, key = api_tables[endpoint]
+    cached_version, df_cached = st.session_state["api_frames"].get(endpoint, (None, None))
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        globals()[df_name] = pd.DataFrame(data)
+        if load_version is not None and cached_version == load_version:
+            df_new = df_cached
+        elif (load_version is not None and cached_version is not None and cached_version <= load_version
+              and not df_cached.empty):
+            # Only rows changed since the cached version, then drop deleted and replaced keys
+            response = requests.get(url, params={"since": cached_version})
+            response.raise_for_status()
+            df_delta = pd.DataFrame(response.json())
+            response = requests.get(f"{FASTAPI_BASE_URL}/deletions/", params={"since": cached_version, "table_name": table_name})
+            response.raise_for_status()
+            deleted_keys = [d["row_key"] for d in response.json()]
+
+            df_new = df_cached
+            if deleted_keys:
+                df_new = df_new[~df_new[key].astype(str).isin(deleted_keys)]
+            if not df_delta.empty:
+                df_new = df_new[~df_new[key].isin(df_delta[key])]
+                df_new = pd.concat([df_new, df_delta], ignore_index=True).sort_values(key, ignore_index=True)
+        else:
+            # First load, API without delta sync, or a reset database (version went backwards)
+            response = requests.get(url)
+            response.raise_for_status()
+            df_new = pd.DataFrame(response.json())
+        st.session_state["api_frames"][endpoint] = (load_version, df_new)
+        globals()[df_name] = df_new
     except requests.exceptions.RequestException as e:
         st.error(f"Error fetching {endpoint} data from API: {e}")
 
@@ -347,37 +388,43 @@ if page == "Finance Use Case":
     if df_merged_filtered.empty:
         st.warning("Keine Daten für das ausgewählte Jahr verfügbar.")
     else:
-        # 1️⃣ Filter: letzte 6 Monate
-        six_months_ago = today - pd.DateOffset(months=6)
-        df_recent = df_merged_filtered[df_merged_filtered['month'] > six_months_ago]
+        # 1️⃣ Filter: letzte 6 Monate bis zum aktuellen Monat, höchstens bis Dezember des gewählten Jahres
+        end_month = min(pd.Timestamp.today().normalize().replace(day=1), pd.Timestamp(year=selected_year, month=12, day=1))
+        six_months_ago = end_month - pd.DateOffset(months=6)
+        # Gleicher Zeitraum wie in der API, auch wenn er ins Vorjahr reicht
+        df_recent = df_merged[(df_merged['month'] > six_months_ago) & (df_merged['month'] <= end_month)]
+
+        # 2️⃣ Durchschnitt pro Gesellschaft, Gesamt-Durchschnitt und Ampel werden per SQL in der API berechnet
+        df_avg = pd.DataFrame()
+        try:
+            response = requests.get(
+                f"{FASTAPI_BASE_URL}/finance/revenue-per-employee/",
+                params={"window": 6, "end_month": end_month.date().isoformat()}
+            )
+            response.raise_for_status()
+            df_avg = pd.DataFrame(response.json())
+        except requests.exceptions.RequestException as e:
+            st.error(f"Error fetching finance data from API: {e}")
 
-        if df_recent.empty:
+        if df_recent.empty or df_avg.empty:
             st.warning("Keine Daten für die letzten 6 Monate vorhanden.")
         else:
-            # 2️⃣ Durchschnitt pro Gesellschaft
-            df_avg = df_recent.groupby('company_name', as_index=False)['revenue_per_employee'].mean()
-
             # 3️⃣ Gesamt-Durchschnitt
-            overall_avg = df_avg['revenue_per_employee'].mean()
+            overall_avg = df_avg['group_average'].iloc[0]
             st.metric("Gesamt-Durchschnitt Umsatz pro Mitarbeiter (EUR)", f"{overall_avg:,.2f}")
 
             # 4️⃣ Unterdurchschnittliche Gesellschaften
-            df_underperformers = df_avg[df_avg['revenue_per_employee'] < overall_avg]
+            df_underperformers = df_avg[df_avg['performance'] != "green"][['company_name', 'revenue_per_employee']]
             st.subheader("Unterdurchschnittliche Gesellschaften")
             st.dataframe(df_underperformers.sort_values('revenue_per_employee'), use_container_width=True)
 
             # 5️⃣ Heatmap der Performance
             st.subheader("Umsatz pro Mitarbeiter Heatmap")
-            heatmap_data = df_avg.copy()
-            heatmap_data['color'] = np.where(
-                heatmap_data['revenue_per_employee'] >= overall_avg, "green",
-                np.where(heatmap_data['revenue_per_employee'] >= 0.9*overall_avg, "yellow", "red")
-            )
             fig = px.bar(
-                heatmap_data,
+                df_avg,
                 x='company_name',
                 y='revenue_per_employee',
-                color='color',
+                color='performance',
                 color_discrete_map={"green": "green", "yellow": "yellow", "red": "red"},
                 title="Umsatz pro Mitarbeiter nach Gesellschaft"
             )
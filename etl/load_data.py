@@ -1,101 +1,202 @@
 import os
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, inspect, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-db_user = os.environ.get("DB_USER")
-db_password = os.environ.get("DB_PASSWORD")
-db_host = os.environ.get("DB_HOST")
-db_port = int(os.environ.get("DB_PORT"))
-db_name = os.environ.get("DB_NAME")
-
-# Connect to PostgreSQL
-engine = create_engine(f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}")
-
-# Paths to CSVs
-data_dir = os.path.join(os.getcwd(), "data")  # inside container: /app/data
-
-company_file = os.path.join(data_dir, "companies.csv")
-headcount_file = os.path.join(data_dir, "headcount.csv")
-revenue_file = os.path.join(data_dir, "revenue.csv")
-dim_date_file = os.path.join(data_dir, "dim_date.csv")
-
-# Check CSV existence
-for file in [company_file, headcount_file, revenue_file, dim_date_file]:
-    if not os.path.exists(file):
-        print(f"Missing CSV file: {file}. Exiting.")
-        exit(1)
-
-# Load CSVs
-company_df = pd.read_csv(company_file)
-headcount_df = pd.read_csv(headcount_file)
-revenue_df = pd.read_csv(revenue_file)
-dim_date_df = pd.read_csv(dim_date_file)
-
-# Convert 'month' columns to date format
-headcount_df["month"] = pd.to_datetime(headcount_df["month"]).dt.date
-revenue_df["month"] = pd.to_datetime(revenue_df["month"]).dt.date
-dim_date_df["month"] = pd.to_datetime(dim_date_df["month"]).dt.date
-
-# Create tables if they don't exist
-with engine.begin() as conn:
-    conn.execute(text("DROP TABLE IF EXISTS fact_revenue"))
-    conn.execute(text("DROP TABLE IF EXISTS fact_headcount"))
-    conn.execute(text("DROP TABLE IF EXISTS dim_date"))
-    conn.execute(text("DROP TABLE IF EXISTS dim_company"))
-    
-    conn.execute(text("""
-    CREATE TABLE IF NOT EXISTS dim_company (
-        company_id INTEGER PRIMARY KEY,
-        company_name TEXT,
-        location TEXT,
-        industry TEXT
-    );
-    """))
-
-    conn.execute(text("""
-    CREATE TABLE IF NOT EXISTS dim_date (
-        month_id INTEGER, 
-        month_num INTEGER,
-        year INTEGER,
-        quarter INTEGER,
-        month_name TEXT,
-        month DATE PRIMARY KEY
-    );
-    """))
-
-    conn.execute(text("""
-    CREATE TABLE IF NOT EXISTS fact_revenue (
-        id INTEGER PRIMARY KEY,
-        company_id INTEGER REFERENCES dim_company(company_id),
-        month DATE REFERENCES dim_date(month),
-        revenue_eur NUMERIC
-    );
-    """))
-
-    conn.execute(text("""
-    CREATE TABLE IF NOT EXISTS fact_headcount (
-        id INTEGER PRIMARY KEY,
-        company_id INTEGER REFERENCES dim_company(company_id),
-        month DATE REFERENCES dim_date(month),
-        employee_count INTEGER
-    );
-    """))
-
-# Load data into tables in correct order
-# Load data into tables in correct order
-company_df.to_sql("dim_company", engine, if_exists="append", index=False, method="multi") #replace would drop previously definde dataframe and use the one from the csv
-dim_date_df.to_sql("dim_date", engine, if_exists="append", index=False, method="multi")
-
-revenue_df.to_sql("fact_revenue", engine, if_exists="append", index=False, method="multi")
-headcount_df.to_sql("fact_headcount", engine, if_exists="append", index=False, method="multi")
-
-# Debug
-with engine.begin() as conn:
-    print("dim_company rows:", conn.execute(text("SELECT COUNT(*) FROM dim_company")).scalar())
-    print("fact_headcount rows (attempted):", len(headcount_df))
-
-print("ETL complete!")
\ No newline at end of file
+
+def get_engine():
+    """Engine from DATABASE_URL if set, otherwise from the DB_* variables of the Docker setup."""
+    database_url = os.environ.get("DATABASE_URL")
+    if database_url is None:
+        db_user = os.environ.get("DB_USER")
+        db_password = os.environ.get("DB_PASSWORD")
+        db_host = os.environ.get("DB_HOST")
+        db_port = int(os.environ.get("DB_PORT"))
+        db_name = os.environ.get("DB_NAME")
+        database_url = f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+    return create_engine(database_url)
+
+
+def read_csvs(data_dir):
+    """Read the CSVs and return the tables in load order (dimensions before facts) with their key column."""
+    company_df = pd.read_csv(os.path.join(data_dir, "companies.csv"))
+    headcount_df = pd.read_csv(os.path.join(data_dir, "headcount.csv"))
+    revenue_df = pd.read_csv(os.path.join(data_dir, "revenue.csv"))
+    dim_date_df = pd.read_csv(os.path.join(data_dir, "dim_date.csv"))
+
+    # Convert 'month' columns to date format
+    headcount_df["month"] = pd.to_datetime(headcount_df["month"]).dt.date
+    revenue_df["month"] = pd.to_datetime(revenue_df["month"]).dt.date
+    dim_date_df["month"] = pd.to_datetime(dim_date_df["month"]).dt.date
+
+    return [
+        ("dim_company", "company_id", company_df),
+        ("dim_date", "month", dim_date_df),
+        ("fact_revenue", "id", revenue_df),
+        ("fact_headcount", "id", headcount_df),
+    ]
+
+
+def upsert_on(key):
+    """pandas to_sql method that inserts rows or updates them when the key already exists."""
+    def method(pd_table, conn, keys, data_iter):
+        dialect = sqlite if conn.dialect.name == "sqlite" else postgresql
+        rows = [dict(zip(keys, row)) for row in data_iter]
+        stmt = dialect.insert(pd_table.table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_={col: stmt.excluded[col] for col in keys if col != key},
+        )
+        return conn.execute(stmt).rowcount
+    return method
+
+
+def diff_table(conn, table, key, df):
+    """Compare the CSV rows with the stored rows: returns (new or changed rows, deleted keys)."""
+    existing = pd.read_sql(text(f"SELECT {', '.join(df.columns)} FROM {table}"), conn)
+    if existing.empty:
+        return df, []
+    existing = existing.astype(df.dtypes.to_dict())
+    if "month" in existing.columns:
+        existing["month"] = pd.to_datetime(existing["month"]).dt.date
+    compared = df.merge(existing, how="left", on=list(df.columns), indicator=True)
+    changed = df[(compared["_merge"] == "left_only").to_numpy()]
+    deleted = existing.loc[~existing[key].isin(df[key]), key].tolist()
+    return changed, deleted
+
+
+def create_tables(engine, tables):
+    """Create tables if they don't exist. Every row carries the load_version of the
+    ETL run that last inserted or changed it, so clients can fetch only deltas."""
+    with engine.begin() as conn:
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS etl_load (
+            load_version INTEGER PRIMARY KEY,
+            loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """))
+
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS etl_deletion (
+            table_name TEXT NOT NULL,
+            row_key TEXT NOT NULL,
+            load_version INTEGER NOT NULL,
+            PRIMARY KEY (table_name, row_key, load_version)
+        );
+        """))
+
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS dim_company (
+            company_id INTEGER PRIMARY KEY,
+            company_name TEXT,
+            location TEXT,
+            industry TEXT,
+            load_version INTEGER NOT NULL DEFAULT 0
+        );
+        """))
+
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS dim_date (
+            month_id INTEGER,
+            month_num INTEGER,
+            year INTEGER,
+            quarter INTEGER,
+            month_name TEXT,
+            month DATE PRIMARY KEY,
+            load_version INTEGER NOT NULL DEFAULT 0
+        );
+        """))
+
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS fact_revenue (
+            id INTEGER PRIMARY KEY,
+            company_id INTEGER REFERENCES dim_company(company_id),
+            month DATE REFERENCES dim_date(month),
+            revenue_eur NUMERIC,
+            load_version INTEGER NOT NULL DEFAULT 0
+        );
+        """))
+
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS fact_headcount (
+            id INTEGER PRIMARY KEY,
+            company_id INTEGER REFERENCES dim_company(company_id),
+            month DATE REFERENCES dim_date(month),
+            employee_count INTEGER,
+            load_version INTEGER NOT NULL DEFAULT 0
+        );
+        """))
+
+        # Tables created by earlier ETL versions have no load_version column yet
+        for table, _, _ in tables:
+            columns = [col["name"] for col in inspect(conn).get_columns(table)]
+            if "load_version" not in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN load_version INTEGER NOT NULL DEFAULT 0"))
+
+        for table in [table for table, _, _ in tables] + ["etl_deletion"]:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_load_version ON {table} (load_version)"))
+
+
+def sync_tables(engine, tables):
+    """Sync data into tables in one transaction: upserts in load order, deletions in reverse order.
+    Returns the new load_version and the number of upserted and deleted rows per table."""
+    stats = {}
+    with engine.begin() as conn:
+        load_version = conn.execute(text("SELECT COALESCE(MAX(load_version), 0) + 1 FROM etl_load")).scalar()
+        conn.execute(text("INSERT INTO etl_load (load_version, loaded_at) VALUES (:v, CURRENT_TIMESTAMP)"), {"v": load_version})
+
+        deletions = {}
+        for table, key, df in tables:
+            changed, deleted = diff_table(conn, table, key, df)
+            changed = changed.assign(load_version=load_version)
+            if not changed.empty:
+                changed.to_sql(table, conn, if_exists="append", index=False, method=upsert_on(key), chunksize=1000)
+            deletions[table] = deleted
+            stats[table] = {"upserted": len(changed), "deleted": len(deleted)}
+
+        for table, key, _ in reversed(tables):
+            if deletions[table]:
+                conn.execute(
+                    text(f"DELETE FROM {table} WHERE {key} IN :keys").bindparams(bindparam("keys", expanding=True)),
+                    {"keys": deletions[table]},
+                )
+                conn.execute(
+                    text("INSERT INTO etl_deletion (table_name, row_key, load_version) VALUES (:t, :k, :v)"),
+                    [{"t": table, "k": str(k), "v": load_version} for k in deletions[table]],
+                )
+    return load_version, stats
+
+
+def main():
+    engine = get_engine()
+
+    # Paths to CSVs
+    data_dir = os.path.join(os.getcwd(), "data")  # inside container: /app/data
+
+    # Check CSV existence
+    for name in ["companies.csv", "headcount.csv", "revenue.csv", "dim_date.csv"]:
+        file = os.path.join(data_dir, name)
+        if not os.path.exists(file):
+            print(f"Missing CSV file: {file}. Exiting.")
+            exit(1)
+
+    tables = read_csvs(data_dir)
+    create_tables(engine, tables)
+    load_version, stats = sync_tables(engine, tables)
+    for table, counts in stats.items():
+        print(f"{table}: {counts['upserted']} rows inserted/updated, {counts['deleted']} rows deleted")
+
+    # Debug
+    with engine.begin() as conn:
+        print("dim_company rows:", conn.execute(text("SELECT COUNT(*) FROM dim_company")).scalar())
+        print("fact_headcount rows:", conn.execute(text("SELECT COUNT(*) FROM fact_headcount")).scalar())
+
+    print(f"ETL complete! (load_version {load_version})")
+
+
+if __name__ == "__main__":
+    main()